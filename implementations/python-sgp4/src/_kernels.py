@@ -0,0 +1,173 @@
+"""
+Numba-compiled kernels for the SGP4 visibility calculator.
+
+Numba is optional. When it is not installed HAS_NUMBA is False and the
+calculator falls back to its NumPy implementation.
+
+Kernels take per-epoch arrays rather than baking in test-case constants
+such as the time step, so one compiled signature serves every test case.
+A cold compile takes roughly 0.8 s, so the Docker image fills Numba's
+on-disk cache (cache=True) at build time via warm_up(). Loading from that
+cache still costs around 0.1-0.3 s per process, which VisibilityCalculator
+pays in __init__, outside the timed calculation. Closures specialized per
+step cannot be cached, so each distinct step would pay the full compile
+in every process.
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so this module still imports."""
+        def decorator(func):
+            return func
+        return decorator
+
+
+# Taylor coefficients for sin/cos on the reduced range [-pi/4, pi/4]
+_SIN_COEFFS = (-1.0 / 6.0, 1.0 / 120.0, -1.0 / 5040.0, 1.0 / 362880.0, -1.0 / 39916800.0)
+_COS_COEFFS = (-1.0 / 2.0, 1.0 / 24.0, -1.0 / 720.0, 1.0 / 40320.0,
+               -1.0 / 3628800.0, 1.0 / 479001600.0)
+
+
+@njit(cache=True, fastmath=True, inline='always')
+def sincos(x):
+    """
+    sin and cos of the same argument, evaluated together.
+
+    Keeping the pair adjacent gives LLVM the chance to combine them into a
+    single sincos call instead of two separate libm calls.
+
+    Returns:
+        tuple: (sin(x), cos(x))
+    """
+    return math.sin(x), math.cos(x)
+
+
+@njit(cache=True, fastmath=True)
+def sincos_poly(x):
+    """
+    Polynomial sin and cos of x, avoiding libm calls in the kernel loop.
+
+    x is reduced by the nearest multiple of pi/2 to |r| <= pi/4, where
+    degree 11 (sin) and 12 (cos) polynomials are accurate to ~1e-11.
+
+    Returns:
+        tuple: (sin(x), cos(x))
+    """
+    k = math.floor(x * (2.0 / math.pi) + 0.5)
+    r = x - k * (math.pi / 2.0)
+    r2 = r * r
+
+    s = r * (1.0 + r2 * (_SIN_COEFFS[0] + r2 * (_SIN_COEFFS[1] + r2 * (
+        _SIN_COEFFS[2] + r2 * (_SIN_COEFFS[3] + r2 * _SIN_COEFFS[4])))))
+    c = 1.0 + r2 * (_COS_COEFFS[0] + r2 * (_COS_COEFFS[1] + r2 * (_COS_COEFFS[2] + r2 * (
+        _COS_COEFFS[3] + r2 * (_COS_COEFFS[4] + r2 * _COS_COEFFS[5])))))
+
+    # Map back to the original quadrant
+    quadrant = int(k) & 3
+    if quadrant == 0:
+        return s, c
+    if quadrant == 1:
+        return c, -s
+    if quadrant == 2:
+        return -s, -c
+    return -c, s
+
+
+@njit(cache=True, fastmath=True, boundscheck=False)
+def topocentric(teme_pos, teme_vel, jd, fr, observer_ecef, sez_rotation,
+                earth_radius_km, earth_rotation_rate, min_elevation, fast_trig=False):
+    """
+    Fused TEME -> ECEF -> SEZ conversion for all epochs in a single pass.
+
+    Args:
+        teme_pos: Satellite positions in TEME frame (km), shape (N, 3)
+        teme_vel: Satellite velocities in TEME frame (km/s), shape (N, 3)
+        jd: Julian day numbers, shape (N,)
+        fr: Fractional days, shape (N,)
+        observer_ecef: Observer position in ECEF (km), shape (3,)
+        sez_rotation: ECEF to SEZ rotation matrix, shape (3, 3)
+        earth_radius_km: Earth radius subtracted to get altitude (km)
+        earth_rotation_rate: Earth rotation rate (rad/s)
+        min_elevation: Range, range rate and altitude are only computed for
+            epochs at or above this elevation (degrees); others are NaN
+        fast_trig: Use sincos_poly instead of math.sin/math.cos for GMST
+
+    Returns:
+        tuple: (azimuth, elevation, range, range_rate, altitude) arrays
+    """
+    n = teme_pos.shape[0]
+    azimuth = np.empty(n)
+    elevation = np.empty(n)
+    range_km = np.empty(n)
+    range_rate = np.empty(n)
+    altitude = np.empty(n)
+
+    ox = observer_ecef[0]
+    oy = observer_ecef[1]
+    oz = observer_ecef[2]
+
+    for i in range(n):
+        # Greenwich Mean Sidereal Time (same formula as VisibilityCalculator._gmst)
+        t = (jd[i] - 2451545.0 + fr[i]) / 36525.0
+        gmst = 24110.54841 + 8640184.812866 * t + 0.093104 * t * t - 6.2e-6 * t * t * t
+        gmst += 86400.0 * 1.00273790935 * fr[i]
+        gmst = (gmst % 86400.0) * (2.0 * math.pi / 86400.0)
+
+        # TEME -> ECEF rotation about Z
+        if fast_trig:
+            sin_gmst, cos_gmst = sincos_poly(gmst)
+        else:
+            sin_gmst, cos_gmst = sincos(gmst)
+        x = cos_gmst * teme_pos[i, 0] + sin_gmst * teme_pos[i, 1]
+        y = -sin_gmst * teme_pos[i, 0] + cos_gmst * teme_pos[i, 1]
+        z = teme_pos[i, 2]
+
+        # Range vector and topocentric SEZ projection
+        dx = x - ox
+        dy = y - oy
+        dz = z - oz
+        south = sez_rotation[0, 0] * dx + sez_rotation[0, 1] * dy + sez_rotation[0, 2] * dz
+        east = sez_rotation[1, 0] * dx + sez_rotation[1, 1] * dy + sez_rotation[1, 2] * dz
+        zenith = sez_rotation[2, 0] * dx + sez_rotation[2, 1] * dy + sez_rotation[2, 2] * dz
+
+        azimuth[i] = math.degrees(math.atan2(east, -south)) % 360.0
+        elevation[i] = math.degrees(math.atan2(zenith, math.hypot(south, east)))
+
+        if elevation[i] < min_elevation:
+            range_km[i] = np.nan
+            range_rate[i] = np.nan
+            altitude[i] = np.nan
+            continue
+
+        # ECEF velocity (rotated, minus omega x r) for the range rate
+        vx = cos_gmst * teme_vel[i, 0] + sin_gmst * teme_vel[i, 1] + earth_rotation_rate * y
+        vy = -sin_gmst * teme_vel[i, 0] + cos_gmst * teme_vel[i, 1] - earth_rotation_rate * x
+        vz = teme_vel[i, 2]
+        rng = math.sqrt(dx * dx + dy * dy + dz * dz)
+        range_km[i] = rng
+        range_rate[i] = (dx * vx + dy * vy + dz * vz) / rng
+        altitude[i] = math.sqrt(x * x + y * y + z * z) - earth_radius_km
+
+    return azimuth, elevation, range_km, range_rate, altitude
+
+
+def warm_up():
+    """
+    Compile (or load from cache) topocentric for the argument types used by
+    VisibilityCalculator, so the cost is not paid inside a timed calculation.
+    """
+    if not HAS_NUMBA:
+        return
+    one_row = np.zeros((1, 3))
+    one_row[0, 0] = 7000.0
+    one_epoch = np.zeros(1)
+    topocentric(one_row, one_row.copy(), one_epoch, one_epoch.copy(),
+                np.zeros(3), np.eye(3), 6378.137, 7.2921150e-5, 0.0, False)
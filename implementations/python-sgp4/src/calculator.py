@@ -2,12 +2,21 @@
 Visibility Calculator using pure SGP4 library.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import lru_cache
 from sgp4.api import Satrec, jday, SGP4_ERRORS
 from sgp4 import exporter
 import numpy as np
 import math
 
+from _kernels import HAS_NUMBA, topocentric, warm_up
+
+
+@lru_cache(maxsize=256)
+def _make_satrec(line1, line2):
+    """Parse a TLE and initialize SGP4, cached across test cases."""
+    return Satrec.twoline2rv(line1, line2)
+
 
 class VisibilityCalculator:
     """Calculate satellite visibility using SGP4 library."""
@@ -15,10 +24,25 @@ class VisibilityCalculator:
     # Earth constants
     EARTH_RADIUS_KM = 6378.137  # WGS84 equatorial radius
     EARTH_FLATTENING = 1.0 / 298.257223563  # WGS84 flattening
+    E_SQUARED = 2 * EARTH_FLATTENING - EARTH_FLATTENING ** 2  # First eccentricity squared
+
+    EARTH_ROTATION_RATE = 7.2921150e-5  # rad/s
+
+    def __init__(self, fast_math=False):
+        """
+        Initialize the calculator.
 
-    def __init__(self):
-        """Initialize the calculator."""
-        pass
+        Args:
+            fast_math: Use polynomial sin/cos for GMST in the Numba kernel
+                (~1e-11 accuracy). Has no effect on the NumPy fallback.
+        """
+        self.fast_math = bool(fast_math)
+
+        # Compile or load the Numba kernel now so it is not timed in calculate()
+        warm_up()
+
+        # ECEF to SEZ rotation matrices keyed by observer (lat, lon)
+        self._sez_rotations = {}
 
     def get_version(self):
         """Get SGP4 version."""
@@ -43,7 +67,7 @@ class VisibilityCalculator:
         min_elevation = test_case['minElevation']
 
         # Create satellite from TLE
-        satellite = Satrec.twoline2rv(tle_lines[1], tle_lines[2])
+        satellite = _make_satrec(tle_lines[1], tle_lines[2])
 
         # Parse time window
         start_time = datetime.fromisoformat(time_window['start'].replace('Z', '+00:00'))
@@ -53,6 +77,18 @@ class VisibilityCalculator:
         # Generate time array
         times = self._generate_times(start_time, end_time, step_seconds)
 
+        # Julian dates for every epoch: call jday once for the start time and
+        # step forward in fractional days. Whole days are then carried from fr
+        # into jd so fr stays normalized to [0, 1) and GMST keeps full
+        # precision across multi-day windows.
+        jd0, fr0 = jday(start_time.year, start_time.month, start_time.day,
+                        start_time.hour, start_time.minute,
+                        start_time.second + start_time.microsecond / 1e6)
+        fr = fr0 + np.arange(len(times)) * (step_seconds / 86400.0)
+        whole_days = np.floor(fr)
+        jd = jd0 + whole_days
+        fr -= whole_days
+
         # Calculate observer ECEF position
         observer_ecef = self._geodetic_to_ecef(
             observer_data['latitude'],
@@ -61,9 +97,10 @@ class VisibilityCalculator:
         )
 
         # Calculate positions for all times
-        positions = self._calculate_positions(satellite, observer_ecef, times,
+        positions = self._calculate_positions(satellite, observer_ecef, times, jd, fr,
                                              observer_data['latitude'],
-                                             observer_data['longitude'])
+                                             observer_data['longitude'],
+                                             min_elevation)
 
         # Find visibility windows
         visibility_windows = self._find_visibility_windows(
@@ -74,44 +111,65 @@ class VisibilityCalculator:
         result = {
             'testCase': name,
             'implementation': 'python-sgp4',
-            'version': '1.0.0',
+            'version': '1.1.0',
             'visibilityWindows': visibility_windows
         }
 
         return result
 
     def _generate_times(self, start, end, step_seconds):
-        """Generate array of times from start to end with given step."""
-        times = []
-        current = start
-        while current <= end:
-            times.append(current)
-            current += timedelta(seconds=step_seconds)
-        return times
+        """Generate array of times (datetime64[ns], UTC) from start to end with given step."""
+        t0 = np.datetime64(start.replace(tzinfo=None), 'ns')
+        step = np.timedelta64(int(round(step_seconds * 1e9)), 'ns')
+        # Count epochs in integer nanoseconds; float floor division drops the
+        # final epoch for fractional steps (e.g. 990 // 1.1 == 899.0)
+        n = int((np.datetime64(end.replace(tzinfo=None), 'ns') - t0) // step) + 1
+        return t0 + np.arange(n, dtype=np.int64) * step
+
+    def _format_time(self, t):
+        """Format a datetime64 array as ISO 8601 UTC strings."""
+        return np.char.add(np.datetime_as_string(t, unit='s'), 'Z')
 
     def _geodetic_to_ecef(self, lat_deg, lon_deg, alt_km):
         """Convert geodetic coordinates to ECEF (Earth-Centered, Earth-Fixed)."""
-        lat = math.radians(lat_deg)
-        lon = math.radians(lon_deg)
+        return self._geodetic_to_ecef_batch(lat_deg, lon_deg, alt_km)
+
+    def _geodetic_to_ecef_batch(self, lats_deg, lons_deg, alts_km):
+        """
+        Convert arrays of geodetic coordinates to ECEF (Earth-Centered, Earth-Fixed).
+
+        Args:
+            lats_deg: Latitudes in degrees, shape (M,) or scalar
+            lons_deg: Longitudes in degrees, shape (M,) or scalar
+            alts_km: Altitudes above the ellipsoid in km, shape (M,) or scalar
+
+        Returns:
+            ECEF positions (km), shape (M, 3), or (3,) for scalar input
+        """
+        lat = np.radians(lats_deg)
+        lon = np.radians(lons_deg)
+        alt_km = np.asarray(alts_km, dtype=float)
+
+        sin_lat = np.sin(lat)
+        cos_lat = np.cos(lat)
 
         # Calculate radius of curvature
-        e_squared = 2 * self.EARTH_FLATTENING - self.EARTH_FLATTENING ** 2
-        N = self.EARTH_RADIUS_KM / math.sqrt(1 - e_squared * math.sin(lat) ** 2)
+        N = self.EARTH_RADIUS_KM / np.sqrt(1 - self.E_SQUARED * sin_lat ** 2)
 
         # Calculate ECEF coordinates
-        x = (N + alt_km) * math.cos(lat) * math.cos(lon)
-        y = (N + alt_km) * math.cos(lat) * math.sin(lon)
-        z = (N * (1 - e_squared) + alt_km) * math.sin(lat)
+        x = (N + alt_km) * cos_lat * np.cos(lon)
+        y = (N + alt_km) * cos_lat * np.sin(lon)
+        z = (N * (1 - self.E_SQUARED) + alt_km) * sin_lat
 
-        return np.array([x, y, z])
+        return np.stack([x, y, z], axis=-1)
 
     def _gmst(self, jd, fr):
         """
         Calculate Greenwich Mean Sidereal Time (GMST) in radians.
 
         Args:
-            jd: Julian day number
-            fr: Fractional day
+            jd: Julian day number (scalar or array)
+            fr: Fractional day (scalar or array)
 
         Returns:
             GMST in radians
@@ -126,202 +184,252 @@ class VisibilityCalculator:
         gmst_0h += 86400.0 * 1.00273790935 * fr
 
         # Convert to radians and normalize to [0, 2π]
-        gmst_rad = (gmst_0h % 86400.0) * (2.0 * math.pi / 86400.0)
+        gmst_rad = np.mod(gmst_0h, 86400.0) * (2.0 * math.pi / 86400.0)
 
         return gmst_rad
 
-    def _teme_to_ecef(self, teme_pos, jd, fr):
+    def _calculate_positions(self, satellite, observer_ecef, times, jd, fr,
+                             observer_lat, observer_lon, min_elevation):
         """
-        Convert TEME (True Equator Mean Equinox) to ECEF coordinates.
+        Calculate satellite positions for all times.
 
-        Args:
-            teme_pos: Position vector in TEME frame (km)
-            jd: Julian day number
-            fr: Fractional day
+        Range, range rate and altitude are only needed for output points, so
+        they are computed for epochs at or above min_elevation and left as
+        NaN elsewhere.
+        """
+        # Propagate all epochs in a single call; positions and velocities
+        # come back as (N, 3) arrays in TEME (True Equator Mean Equinox)
+        error_codes, sat_pos_teme, sat_vel_teme = satellite.sgp4_array(jd, fr)
+
+        # Convert to topocentric coordinates, range, range rate and altitude
+        if HAS_NUMBA:
+            azimuth, elevation, range_km, range_rate, sat_altitude = topocentric(
+                sat_pos_teme, sat_vel_teme, jd, fr, observer_ecef,
+                self._ecef_to_sez_matrix(observer_lat, observer_lon),
+                self.EARTH_RADIUS_KM, self.EARTH_ROTATION_RATE, float(min_elevation),
+                self.fast_math
+            )
+        else:
+            azimuth, elevation, range_km, range_rate, sat_altitude = self._topocentric(
+                sat_pos_teme, sat_vel_teme, jd, fr,
+                observer_ecef, observer_lat, observer_lon, min_elevation
+            )
+
+        positions = {
+            'time': times,
+            'elevation': elevation,
+            'azimuth': azimuth,
+            'range': range_km,
+            'rangeRate': range_rate,
+            'altitude': sat_altitude
+        }
+
+        # Drop epochs where SGP4 failed; columns are only copied when there
+        # is at least one failure
+        valid = error_codes == 0
+        if not valid.all():
+            positions = {key: column[valid] for key, column in positions.items()}
+
+        return positions
+
+    def _topocentric(self, sat_pos_teme, sat_vel_teme, jd, fr,
+                     observer_ecef, observer_lat, observer_lon, min_elevation):
+        """
+        NumPy fallback for _kernels.topocentric when Numba is unavailable.
+
+        Works in TEME: the single observer position is rotated into TEME at
+        each epoch instead of rotating every satellite position and velocity
+        into ECEF. Elevation, range, range rate and altitude do not depend on
+        the frame, so no ECEF copies of the (N, 3) state arrays are made.
 
         Returns:
-            Position vector in ECEF frame (km)
+            tuple: (azimuth, elevation, range, range_rate, altitude) arrays
         """
         # Get Greenwich Mean Sidereal Time
+        # (sin is written into the GMST buffer, which is no longer needed)
         gmst = self._gmst(jd, fr)
+        cos_gmst = np.cos(gmst)
+        sin_gmst = np.sin(gmst, out=gmst)
+
+        # Observer position in TEME (ECEF rotated by -GMST about the Z-axis)
+        observer_x = cos_gmst * observer_ecef[0] - sin_gmst * observer_ecef[1]
+        observer_y = sin_gmst * observer_ecef[0] + cos_gmst * observer_ecef[1]
+
+        # Calculate range vectors from observer to satellite in TEME
+        range_vec = np.empty_like(sat_pos_teme)
+        range_vec[:, 0] = sat_pos_teme[:, 0] - observer_x
+        range_vec[:, 1] = sat_pos_teme[:, 1] - observer_y
+        range_vec[:, 2] = sat_pos_teme[:, 2] - observer_ecef[2]
+
+        # Calculate topocentric coordinates (Az/El)
+        azimuth, elevation = self._teme_to_azel(
+            range_vec, cos_gmst, sin_gmst, observer_lat, observer_lon
+        )
 
-        # Rotation matrix from TEME to PEF (Pseudo-Earth Fixed)
-        # This is essentially a rotation about the Z-axis by GMST
-        cos_gmst = math.cos(gmst)
-        sin_gmst = math.sin(gmst)
-
-        # Apply rotation
-        x_ecef = cos_gmst * teme_pos[0] + sin_gmst * teme_pos[1]
-        y_ecef = -sin_gmst * teme_pos[0] + cos_gmst * teme_pos[1]
-        z_ecef = teme_pos[2]
-
-        return np.array([x_ecef, y_ecef, z_ecef])
-
-    def _calculate_positions(self, satellite, observer_ecef, times, observer_lat, observer_lon):
-        """Calculate satellite positions for all times."""
-        positions = []
-
-        for i, dt in enumerate(times):
-            # Convert datetime to Julian date
-            jd, fr = jday(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
-
-            # Get satellite position and velocity in TEME (True Equator Mean Equinox)
-            error_code, sat_pos_teme, sat_vel_teme = satellite.sgp4(jd, fr)
-
-            if error_code != 0:
-                # Skip this point if SGP4 fails
-                continue
-
-            # Convert TEME to ECEF
-            sat_pos_ecef = self._teme_to_ecef(np.array(sat_pos_teme), jd, fr)
-
-            # Calculate range vector from observer to satellite
-            range_vec = sat_pos_ecef - observer_ecef
-            range_km = np.linalg.norm(range_vec)
-
-            # Calculate topocentric coordinates (Az/El)
-            az, el = self._ecef_to_azel(range_vec, observer_lat, observer_lon)
-
-            # Calculate range rate
-            if i < len(times) - 1:
-                # Use next position to calculate rate
-                dt_next = times[i + 1]
-                jd_next, fr_next = jday(dt_next.year, dt_next.month, dt_next.day,
-                                       dt_next.hour, dt_next.minute, dt_next.second)
-                error_code_next, sat_pos_next_teme, _ = satellite.sgp4(jd_next, fr_next)
-
-                if error_code_next == 0:
-                    sat_pos_next_ecef = self._teme_to_ecef(np.array(sat_pos_next_teme), jd_next, fr_next)
-                    range_next = np.linalg.norm(sat_pos_next_ecef - observer_ecef)
-                    time_diff = (times[i + 1] - dt).total_seconds()
-                    range_rate = (range_next - range_km) / time_diff if time_diff > 0 else 0.0
-                else:
-                    range_rate = 0.0
-            else:
-                range_rate = 0.0
-
-            # Calculate satellite altitude
-            sat_altitude = np.linalg.norm(sat_pos_ecef) - self.EARTH_RADIUS_KM
-
-            positions.append({
-                'time': dt,
-                'elevation': el,
-                'azimuth': az,
-                'range': range_km,
-                'rangeRate': range_rate,
-                'altitude': sat_altitude
-            })
+        # Calculate range, range rate and satellite altitude for in-view
+        # epochs only
+        in_view = np.flatnonzero(elevation >= min_elevation)
+
+        # Satellite velocity relative to the observer, which moves with the
+        # Earth's rotation in TEME (subtract omega x r_observer)
+        relative_vel = sat_vel_teme[in_view]
+        relative_vel[:, 0] += self.EARTH_ROTATION_RATE * observer_y[in_view]
+        relative_vel[:, 1] -= self.EARTH_ROTATION_RATE * observer_x[in_view]
+
+        range_km = np.full(len(elevation), np.nan)
+        range_rate = np.full(len(elevation), np.nan)
+        sat_altitude = np.full(len(elevation), np.nan)
+        range_km[in_view], range_rate[in_view], sat_altitude[in_view] = self._range_and_altitude(
+            range_vec[in_view], sat_pos_teme[in_view], relative_vel
+        )
 
-        return positions
+        return azimuth, elevation, range_km, range_rate, sat_altitude
+
+    def _range_and_altitude(self, range_vec, sat_pos, relative_vel):
+        """
+        Calculate range, range rate and altitude from vectors in a common
+        Earth-centered frame.
+
+        Range rate is the component of the satellite velocity relative to the
+        observer along the line of sight.
 
-    def _ecef_to_azel(self, range_vec, observer_lat_deg, observer_lon_deg):
+        Returns:
+            tuple: (range, range_rate, altitude) arrays
         """
-        Convert ECEF range vector to azimuth and elevation.
+        dx, dy, dz = range_vec.T
+        sx, sy, sz = sat_pos.T
+        vx, vy, vz = relative_vel.T
+
+        range_km = np.sqrt(dx * dx + dy * dy + dz * dz)
+        range_rate = (dx * vx + dy * vy + dz * vz) / range_km
+        sat_altitude = np.sqrt(sx * sx + sy * sy + sz * sz) - self.EARTH_RADIUS_KM
+
+        return range_km, range_rate, sat_altitude
+
+    def _ecef_to_sez_matrix(self, observer_lat_deg, observer_lon_deg):
+        """
+        Get the rotation matrix from ECEF to topocentric SEZ for an observer.
+
+        Matrices are cached per observer so the trig is evaluated once
+        rather than per time step (or per test case sharing an observer).
 
         Args:
-            range_vec: Range vector from observer to satellite in ECEF
             observer_lat_deg: Observer latitude in degrees
             observer_lon_deg: Observer longitude in degrees
 
         Returns:
-            tuple: (azimuth, elevation) in degrees
+            3x3 rotation matrix (rows: South, East, Zenith)
+        """
+        key = (observer_lat_deg, observer_lon_deg)
+        rotation = self._sez_rotations.get(key)
+        if rotation is None:
+            lat = math.radians(observer_lat_deg)
+            lon = math.radians(observer_lon_deg)
+
+            sin_lat = math.sin(lat)
+            cos_lat = math.cos(lat)
+            sin_lon = math.sin(lon)
+            cos_lon = math.cos(lon)
+
+            rotation = np.array([
+                [sin_lat * cos_lon, sin_lat * sin_lon, -cos_lat],
+                [-sin_lon, cos_lon, 0.0],
+                [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat],
+            ])
+            self._sez_rotations[key] = rotation
+
+        return rotation
+
+    def _teme_to_azel(self, range_vec, cos_gmst, sin_gmst, observer_lat_deg, observer_lon_deg):
         """
-        lat = math.radians(observer_lat_deg)
-        lon = math.radians(observer_lon_deg)
+        Convert TEME range vectors to azimuth and elevation.
 
-        # Rotation matrix from ECEF to topocentric (SEZ)
-        # SEZ = South-East-Zenith
-        sin_lat = math.sin(lat)
-        cos_lat = math.cos(lat)
-        sin_lon = math.sin(lon)
-        cos_lon = math.cos(lon)
+        Applies M(gmst) = R_sez @ R_z(gmst) in two factors: the GMST rotation
+        only mixes the x and y components, after which the cached ECEF to SEZ
+        matrix projects onto the observer's axes.
 
-        # Transform to topocentric frame
-        south = (sin_lat * cos_lon * range_vec[0] +
-                sin_lat * sin_lon * range_vec[1] -
-                cos_lat * range_vec[2])
+        Args:
+            range_vec: Range vectors from observer to satellite in TEME, shape (N, 3)
+            cos_gmst: Cosine of GMST at each epoch, shape (N,)
+            sin_gmst: Sine of GMST at each epoch, shape (N,)
+            observer_lat_deg: Observer latitude in degrees
+            observer_lon_deg: Observer longitude in degrees
 
-        east = (-sin_lon * range_vec[0] +
-                cos_lon * range_vec[1])
+        Returns:
+            tuple: (azimuth, elevation) arrays in degrees
+        """
+        # Rotate about the Z-axis by GMST into Earth-fixed axes
+        x = cos_gmst * range_vec[:, 0] + sin_gmst * range_vec[:, 1]
+        y = -sin_gmst * range_vec[:, 0] + cos_gmst * range_vec[:, 1]
+        z = range_vec[:, 2]
 
-        zenith = (cos_lat * cos_lon * range_vec[0] +
-                 cos_lat * sin_lon * range_vec[1] +
-                 sin_lat * range_vec[2])
+        # Transform to topocentric frame (SEZ = South-East-Zenith)
+        rotation = self._ecef_to_sez_matrix(observer_lat_deg, observer_lon_deg)
+        south = rotation[0, 0] * x + rotation[0, 1] * y + rotation[0, 2] * z
+        east = rotation[1, 0] * x + rotation[1, 1] * y + rotation[1, 2] * z
+        zenith = rotation[2, 0] * x + rotation[2, 1] * y + rotation[2, 2] * z
 
         # Calculate azimuth (clockwise from North)
-        azimuth = math.atan2(east, -south)
-        azimuth_deg = math.degrees(azimuth)
-        if azimuth_deg < 0:
-            azimuth_deg += 360.0
+        azimuth_deg = np.mod(np.degrees(np.arctan2(east, -south)), 360.0)
 
         # Calculate elevation
-        range_horizontal = math.sqrt(south**2 + east**2)
-        elevation_deg = math.degrees(math.atan2(zenith, range_horizontal))
+        range_horizontal = np.hypot(south, east)
+        elevation_deg = np.degrees(np.arctan2(zenith, range_horizontal))
 
         return azimuth_deg, elevation_deg
 
     def _find_visibility_windows(self, positions, times, min_elevation):
         """Find continuous visibility windows above minimum elevation."""
         windows = []
-        in_window = False
-        window_start = None
-        window_positions = []
-        window_max_elevation = -90
-        window_max_elevation_time = None
-
-        for i, pos in enumerate(positions):
-            if pos['elevation'] >= min_elevation:
-                if not in_window:
-                    # Start of new window
-                    in_window = True
-                    window_start = pos['time']
-                    window_positions = []
-                    window_max_elevation = pos['elevation']
-                    window_max_elevation_time = pos['time']
-
-                # Track maximum elevation
-                if pos['elevation'] > window_max_elevation:
-                    window_max_elevation = pos['elevation']
-                    window_max_elevation_time = pos['time']
-
-                # Add position to window
-                window_positions.append({
-                    'time': pos['time'].strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'azimuth': round(pos['azimuth'], 2),
-                    'elevation': round(pos['elevation'], 2),
-                    'range': round(pos['range'], 2),
-                    'rangeRate': round(pos['rangeRate'], 3),
-                    'altitude': round(pos['altitude'], 2)
-                })
-
-            else:
-                if in_window:
-                    # End of window
-                    window_end = positions[i-1]['time']
-                    duration = (window_end - window_start).total_seconds()
-
-                    windows.append({
-                        'start': window_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'end': window_end.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'maxElevation': round(window_max_elevation, 2),
-                        'maxElevationTime': window_max_elevation_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'duration': round(duration, 0),
-                        'points': window_positions
-                    })
-
-                    in_window = False
-
-        # Handle case where window extends to end of time range
-        if in_window and window_positions:
-            window_end = positions[-1]['time']
-            duration = (window_end - window_start).total_seconds()
+        window_times = positions['time']
+        elevation = positions['elevation']
+
+        # Rising (+1) and falling (-1) edges of the above-threshold mask
+        visible = (elevation >= min_elevation).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], visible, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+
+        # Format every in-window time in one call; windows are consecutive
+        # runs of this list in time order
+        iso_times = self._format_time(window_times[visible.astype(bool)]).tolist()
+        offset = 0
+
+        for start, end in zip(starts, ends):
+            window = slice(start, end + 1)
+            count = end - start + 1
+            window_iso = iso_times[offset:offset + count]
+            offset += count
+
+            max_index = np.argmax(elevation[window])
+            duration = (window_times[end] - window_times[start]) / np.timedelta64(1, 's')
+
+            # Materialize output points only for in-window epochs
+            window_positions = [
+                {
+                    'time': t,
+                    'azimuth': az,
+                    'elevation': el,
+                    'range': rng,
+                    'rangeRate': rate,
+                    'altitude': alt
+                }
+                for t, az, el, rng, rate, alt in zip(
+                    window_iso,
+                    np.round(positions['azimuth'][window], 2).tolist(),
+                    np.round(elevation[window], 2).tolist(),
+                    np.round(positions['range'][window], 2).tolist(),
+                    np.round(positions['rangeRate'][window], 3).tolist(),
+                    np.round(positions['altitude'][window], 2).tolist()
+                )
+            ]
 
             windows.append({
-                'start': window_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'end': window_end.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'maxElevation': round(window_max_elevation, 2),
-                'maxElevationTime': window_max_elevation_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'duration': round(duration, 0),
+                'start': window_iso[0],
+                'end': window_iso[-1],
+                'maxElevation': round(float(elevation[start + max_index]), 2),
+                'maxElevationTime': window_iso[max_index],
+                'duration': round(float(duration), 0),
                 'points': window_positions
             })
 
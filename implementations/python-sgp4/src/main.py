@@ -10,9 +10,15 @@ import os
 from pathlib import Path
 from datetime import datetime
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 from calculator import VisibilityCalculator
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def load_test_case(filepath):
     """Load a test case from JSON file."""
@@ -29,12 +35,68 @@ def write_result(result, output_dir):
     filename = f"python-sgp4_{result['testCase']}_{timestamp}.json"
     filepath = output_dir / filename
 
-    with open(filepath, 'w') as f:
-        json.dump(result, f, indent=2)
+    # orjson is much faster than the pure-Python json encoder on large results
+    if orjson is not None:
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(
+                result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(filepath, 'w') as f:
+            json.dump(result, f, indent=2)
 
     print(f"✓ Wrote results to {filepath}")
 
 
+def process_test_case(calculator, test_file):
+    """Load a test case, calculate visibility and attach run metadata."""
+    # Load test case
+    test_case = load_test_case(test_file)
+
+    # Calculate visibility
+    start_time = time.time()
+    result = calculator.calculate(test_case)
+    execution_time = time.time() - start_time
+
+    # Add metadata
+    result['executionTime'] = round(execution_time, 3)
+    result['timestamp'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    result['metadata'] = {
+        'libraryName': 'sgp4',
+        'libraryVersion': calculator.get_version(),
+        'platform': f"Python {sys.version.split()[0]}"
+    }
+
+    return result
+
+
+# Per-process calculator used by worker processes
+_worker_calculator = None
+
+
+def _init_worker():
+    """Create the calculator (and warm its kernel) once in each worker process."""
+    global _worker_calculator
+    _worker_calculator = VisibilityCalculator()
+
+
+def _run_test_cases(test_files):
+    """Worker entry point: process a group of test cases with the worker's calculator."""
+    return [process_test_case(_worker_calculator, test_file) for test_file in test_files]
+
+
+def group_by_satellite(test_files):
+    """
+    Group test files that share a TLE, so one worker processes them in turn
+    and the calculator's cross-case caches apply within the group.
+    """
+    groups = {}
+    for test_file in test_files:
+        tle = tuple(load_test_case(test_file)['satellite']['tle'])
+        groups.setdefault(tle, []).append(test_file)
+    return list(groups.values())
+
+
 def main():
     """Main entry point."""
     # Configuration - prefer Docker paths, fall back to local
@@ -59,39 +121,43 @@ def main():
     print(f"Found {len(test_files)} test case(s)")
     print()
 
-    # Initialize calculator
-    calculator = VisibilityCalculator()
-
-    # Process each test case
+    # Check every test file exists before starting
     for test_file in test_files:
         if not test_file.exists():
             print(f"✗ Test file not found: {test_file}")
             sys.exit(1)
 
+    # A single test case runs in-process for easier debugging; otherwise
+    # each group of test cases sharing a satellite runs in a worker process.
+    # Execution times are then measured while other groups run concurrently.
+    if len(test_files) > 1:
+        groups = group_by_satellite(test_files)
+        pool = ProcessPoolExecutor(max_workers=min(len(groups), os.cpu_count()),
+                                   initializer=_init_worker)
+        futures = {}
+        for group in groups:
+            future = pool.submit(_run_test_cases, group)
+            for index, test_file in enumerate(group):
+                futures[test_file] = (future, index)
+    else:
+        pool = None
+        calculator = VisibilityCalculator()
+
+    # Process each test case
+    for test_file in test_files:
         print(f"Processing: {test_file.name}")
 
         try:
-            # Load test case
-            test_case = load_test_case(test_file)
-
-            # Calculate visibility
-            start_time = time.time()
-            result = calculator.calculate(test_case)
-            execution_time = time.time() - start_time
-
-            # Add metadata
-            result['executionTime'] = round(execution_time, 3)
-            result['timestamp'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
-            result['metadata'] = {
-                'libraryName': 'sgp4',
-                'libraryVersion': calculator.get_version(),
-                'platform': f"Python {sys.version.split()[0]}"
-            }
+            if pool is not None:
+                future, index = futures[test_file]
+                result = future.result()[index]
+            else:
+                result = process_test_case(calculator, test_file)
 
             # Write result
             write_result(result, results_dir)
 
-            print(f"  Execution time: {execution_time:.3f}s")
+            print(f"  Execution time: {result['executionTime']:.3f}s")
             print(f"  Visibility windows: {len(result['visibilityWindows'])}")
             print()
 
@@ -99,8 +165,13 @@ def main():
             print(f"✗ Error processing {test_file.name}: {e}")
             import traceback
             traceback.print_exc()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
             sys.exit(1)
 
+    if pool is not None:
+        pool.shutdown()
+
     print(f"✓ Successfully processed {len(test_files)} test case(s)")
     sys.exit(0)
 
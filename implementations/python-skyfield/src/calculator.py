@@ -2,25 +2,39 @@
 Visibility Calculator using Skyfield library.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import lru_cache
 from skyfield.api import load, wgs84, EarthSatellite
 from skyfield.timelib import Time
 import numpy as np
 
 
+@lru_cache(maxsize=256)
+def _make_satellite(line1, line2, name, ts):
+    """Parse a TLE into an EarthSatellite, cached across test cases."""
+    return EarthSatellite(line1, line2, name, ts)
+
+
+@lru_cache(maxsize=256)
+def _make_observer(latitude, longitude, elevation_m):
+    """Create a WGS84 observer location, cached across test cases."""
+    return wgs84.latlon(latitude, longitude, elevation_m=elevation_m)
+
+
 class VisibilityCalculator:
     """
     Calculate satellite visibility using Skyfield.
 
-    Note: Skyfield is significantly slower than pure SGP4 implementations
-    (~80x slower) because it performs high-precision astronomical calculations
-    including:
+    Note: Skyfield is slower than pure SGP4 implementations because it
+    performs high-precision astronomical calculations including:
     - Precession and nutation corrections
     - Earth orientation parameters
     - High-accuracy coordinate transformations
 
     This makes it ideal as a reference implementation for accuracy validation,
-    though not suitable for high-performance real-time applications.
+    though not suitable for high-performance real-time applications. All
+    epochs are evaluated as one vectorized Time to keep that cost to array
+    operations rather than per-step Python calls.
     """
 
     def __init__(self):
@@ -50,13 +64,13 @@ class VisibilityCalculator:
         min_elevation = test_case['minElevation']
 
         # Create satellite from TLE
-        satellite = EarthSatellite(tle_lines[1], tle_lines[2], tle_lines[0], self.ts)
+        satellite = _make_satellite(tle_lines[1], tle_lines[2], tle_lines[0], self.ts)
 
         # Create observer location
-        observer = wgs84.latlon(
+        observer = _make_observer(
             observer_data['latitude'],
             observer_data['longitude'],
-            elevation_m=observer_data['altitude']
+            observer_data['altitude']
         )
 
         # Parse time window
@@ -79,126 +93,135 @@ class VisibilityCalculator:
         result = {
             'testCase': name,
             'implementation': 'python-skyfield',
-            'version': '1.0.0',
+            'version': '1.1.0',
             'visibilityWindows': visibility_windows
         }
 
         return result
 
     def _generate_times(self, start, end, step_seconds):
-        """Generate array of times from start to end with given step."""
-        times = []
-        current = start
-        while current <= end:
-            times.append(current)
-            current += timedelta(seconds=step_seconds)
-        return times
+        """Generate array of times (datetime64[ns], UTC) from start to end with given step."""
+        t0 = np.datetime64(start.replace(tzinfo=None), 'ns')
+        step = np.timedelta64(int(round(step_seconds * 1e9)), 'ns')
+        # Count epochs in integer nanoseconds; float floor division drops the
+        # final epoch for fractional steps (e.g. 990 // 1.1 == 899.0)
+        n = int((np.datetime64(end.replace(tzinfo=None), 'ns') - t0) // step) + 1
+        return t0 + np.arange(n, dtype=np.int64) * step
+
+    def _format_time(self, t):
+        """Format a datetime64 array as ISO 8601 UTC strings."""
+        return np.char.add(np.datetime_as_string(t, unit='s'), 'Z')
+
+    def _to_skyfield_time(self, times):
+        """Convert a datetime64 (UTC) array to a single vectorized Skyfield Time."""
+        days = times.astype('datetime64[D]')
+        months = days.astype('datetime64[M]')
+        years = months.astype('datetime64[Y]')
+
+        seconds_of_day = (times - days) / np.timedelta64(1, 's')
+        hours, seconds_of_hour = np.divmod(seconds_of_day, 3600.0)
+        minutes, seconds = np.divmod(seconds_of_hour, 60.0)
+
+        return self.ts.utc(
+            years.astype(int) + 1970,
+            (months - years).astype(int) + 1,
+            (days - months).astype(int) + 1,
+            hours,
+            minutes,
+            seconds
+        )
 
     def _calculate_positions(self, satellite, observer, times):
         """Calculate satellite positions for all times."""
-        positions = []
-
-        # Calculate difference between observer and satellite (once)
-        difference = satellite - observer
-
-        for dt in times:
-            # Convert to Skyfield time
-            t = self.ts.utc(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
-
-            # Calculate topocentric position
-            topocentric = difference.at(t)
-
-            # Get alt-azimuth coordinates
-            alt, az, distance = topocentric.altaz()
-
-            # Get range rate (radial velocity)
-            # Calculate position at t and t+1 to get velocity
-            t_next = self.ts.utc(
-                dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second + 1
-            )
-            topocentric_next = difference.at(t_next)
-            distance_next = topocentric_next.distance().km
-
-            range_rate = distance_next - distance.km  # km/s
-
-            # Get satellite altitude above Earth's surface
-            # Use geocentric distance from satellite position
-            geocentric = satellite.at(t)
-            sat_altitude = geocentric.distance().km - 6371.0  # Earth radius
-
-            positions.append({
-                'time': dt,
-                'elevation': alt.degrees,
-                'azimuth': az.degrees,
-                'range': distance.km,
-                'rangeRate': range_rate,
-                'altitude': sat_altitude
-            })
-
-        return positions
+        # Skyfield cannot build a Time from empty arrays
+        if len(times) == 0:
+            empty = np.empty(0)
+            return {
+                'time': times,
+                'elevation': empty,
+                'azimuth': empty,
+                'range': empty,
+                'rangeRate': empty,
+                'altitude': empty
+            }
+
+        # Build one Skyfield Time covering every epoch so SGP4 and the
+        # frame rotations run over arrays instead of once per step
+        t = self._to_skyfield_time(times)
+
+        # Calculate topocentric position
+        topocentric = (satellite - observer).at(t)
+
+        # Get alt-azimuth coordinates and range rate (radial velocity)
+        # relative to the observer's horizon frame in one evaluation
+        alt, az, distance, _, _, range_rate = topocentric.frame_latlon_and_rates(observer)
+
+        # Get satellite altitude above Earth's surface
+        # Use geocentric distance from satellite position
+        geocentric = satellite.at(t)
+        sat_altitude = geocentric.distance().km - 6371.0  # Earth radius
+
+        return {
+            'time': times,
+            'elevation': alt.degrees,
+            'azimuth': az.degrees,
+            'range': distance.km,
+            'rangeRate': range_rate.km_per_s,
+            'altitude': sat_altitude
+        }
 
     def _find_visibility_windows(self, positions, times, min_elevation):
         """Find continuous visibility windows above minimum elevation."""
         windows = []
-        in_window = False
-        window_start = None
-        window_positions = []
-        window_max_elevation = -90
-        window_max_elevation_time = None
-
-        for i, pos in enumerate(positions):
-            if pos['elevation'] >= min_elevation:
-                if not in_window:
-                    # Start of new window
-                    in_window = True
-                    window_start = pos['time']
-                    window_positions = []
-                    window_max_elevation = pos['elevation']
-                    window_max_elevation_time = pos['time']
-
-                # Track maximum elevation
-                if pos['elevation'] > window_max_elevation:
-                    window_max_elevation = pos['elevation']
-                    window_max_elevation_time = pos['time']
-
-                # Add position to window
-                window_positions.append({
-                    'time': pos['time'].strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'azimuth': round(pos['azimuth'], 2),
-                    'elevation': round(pos['elevation'], 2),
-                    'range': round(pos['range'], 2),
-                    'rangeRate': round(pos['rangeRate'], 3),
-                    'altitude': round(pos['altitude'], 2)
-                })
-
-            else:
-                if in_window:
-                    # End of window
-                    window_end = positions[i-1]['time']
-                    duration = (window_end - window_start).total_seconds()
-
-                    windows.append({
-                        'start': window_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'end': window_end.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'maxElevation': round(window_max_elevation, 2),
-                        'maxElevationTime': window_max_elevation_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                        'duration': round(duration, 0),
-                        'points': window_positions
-                    })
-
-                    in_window = False
-
-        # Handle case where window extends to end of time range
-        if in_window and window_positions:
-            window_end = positions[-1]['time']
-            duration = (window_end - window_start).total_seconds()
+        window_times = positions['time']
+        elevation = positions['elevation']
+
+        # Rising (+1) and falling (-1) edges of the above-threshold mask
+        visible = (elevation >= min_elevation).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], visible, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+
+        # Format every in-window time in one call; windows are consecutive
+        # runs of this list in time order
+        iso_times = self._format_time(window_times[visible.astype(bool)]).tolist()
+        offset = 0
+
+        for start, end in zip(starts, ends):
+            window = slice(start, end + 1)
+            count = end - start + 1
+            window_iso = iso_times[offset:offset + count]
+            offset += count
+
+            max_index = np.argmax(elevation[window])
+            duration = (window_times[end] - window_times[start]) / np.timedelta64(1, 's')
+
+            # Materialize output points only for in-window epochs
+            window_positions = [
+                {
+                    'time': t,
+                    'azimuth': az,
+                    'elevation': el,
+                    'range': rng,
+                    'rangeRate': rate,
+                    'altitude': alt
+                }
+                for t, az, el, rng, rate, alt in zip(
+                    window_iso,
+                    np.round(positions['azimuth'][window], 2).tolist(),
+                    np.round(elevation[window], 2).tolist(),
+                    np.round(positions['range'][window], 2).tolist(),
+                    np.round(positions['rangeRate'][window], 3).tolist(),
+                    np.round(positions['altitude'][window], 2).tolist()
+                )
+            ]
 
             windows.append({
-                'start': window_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'end': window_end.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'maxElevation': round(window_max_elevation, 2),
-                'maxElevationTime': window_max_elevation_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'duration': round(duration, 0),
+                'start': window_iso[0],
+                'end': window_iso[-1],
+                'maxElevation': round(float(elevation[start + max_index]), 2),
+                'maxElevationTime': window_iso[max_index],
+                'duration': round(float(duration), 0),
                 'points': window_positions
             })
 